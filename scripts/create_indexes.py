@@ -1 +1,44 @@
- 
\ No newline at end of file
+"""
+创建 MongoDB 索引
+用法：python scripts/create_indexes.py
+"""
+import asyncio
+import os
+import sys
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.config import settings
+from src.data.etag_store import MongoETagStore
+
+# developers 集合的索引
+DEVELOPER_INDEXES = [
+    # 按用户名读取/更新缓存
+    ([("username", ASCENDING)], {"unique": True}),
+    # /search 按评分排序并可按国家筛选
+    ([("talent_rank", DESCENDING), ("nation", ASCENDING)], {}),
+    # /search 按领域筛选（domains.<领域> 的通配符索引）
+    ([("domains.$**", ASCENDING)], {}),
+]
+
+async def create_indexes():
+    """
+    创建所需索引，已存在的索引不会重复创建
+    """
+    client = AsyncIOMotorClient(settings.mongodb_url)
+    try:
+        db = client[settings.database_name]
+        for keys, options in DEVELOPER_INDEXES:
+            name = await db.developers.create_index(keys, **options)
+            print(f"索引已创建: developers.{name}")
+        # github_etags 集合的 TTL 索引
+        await MongoETagStore(db.github_etags).ensure_indexes()
+        print("索引已创建: github_etags.updated_at")
+    finally:
+        client.close()
+
+if __name__ == "__main__":
+    asyncio.run(create_indexes())
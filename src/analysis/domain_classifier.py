@@ -1,5 +1,32 @@
-from typing import List, Dict, Set
+from typing import List, Dict, Mapping, Sequence, Set, Tuple
 from collections import defaultdict
+from types import MappingProxyType
+import ahocorasick
+import numpy as np
+
+def _invert(domain_keywords: Mapping[str, Sequence[str]]) -> Mapping[str, Tuple[str, ...]]:
+    """
+    将 {领域: [关键词]} 反转为 {关键词: (领域, ...)}
+    """
+    keyword_domains = defaultdict(list)
+    for domain, keywords in domain_keywords.items():
+        for keyword in keywords:
+            keyword_domains[keyword.lower()].append(domain)
+    return MappingProxyType({keyword: tuple(domains) for keyword, domains in keyword_domains.items()})
+
+# 领域关键词映射
+_DOMAIN_KEYWORDS = MappingProxyType({
+    "Frontend": ("javascript", "typescript", "react", "vue", "angular", "web"),
+    "Backend": ("python", "java", "golang", "nodejs", "django", "spring"),
+    "Mobile": ("android", "ios", "flutter", "react-native", "mobile"),
+    "DevOps": ("docker", "kubernetes", "aws", "cicd", "jenkins"),
+    "AI/ML": ("machine-learning", "deep-learning", "tensorflow", "pytorch"),
+    "Security": ("security", "cryptography", "encryption", "penetration"),
+    "Database": ("mysql", "postgresql", "mongodb", "redis", "elasticsearch"),
+})
+
+# 关键词 -> 领域，编程语言可直接 O(1) 查找，主题自动机也由此构建
+_KEYWORD_TO_DOMAINS = _invert(_DOMAIN_KEYWORDS)
 
 class DomainClassifier:
     """
@@ -7,7 +34,9 @@ class DomainClassifier:
     """
     
     def __init__(self):
-        self.domain_keywords = self._init_domain_keywords()
+        self.domain_keywords = _DOMAIN_KEYWORDS
+        self._domain_index = {domain: i for i, domain in enumerate(self.domain_keywords)}
+        self._topic_automaton = self._build_topic_automaton()
         
     def classify_domains(self, 
                         repositories: List[Dict],
@@ -16,26 +45,38 @@ class DomainClassifier:
         分析开发者的技术领域分布
         返回：{领域: 权重}
         """
-        domain_scores = defaultdict(float)
-        total_weight = 0
+        if not repositories:
+            return {}
         
-        # 分析仓库信息
-        for repo in repositories:
-            # 获取仓库权重（基于star数量）
-            weight = self._calculate_repo_weight(repo)
-            total_weight += weight
-            
-            # 分析仓库的技术领域
-            domains = self._analyze_repo_domains(repo)
-            for domain in domains:
-                domain_scores[domain] += weight
+        matrix, weights = self._build_matrix(repositories)
+        
+        # 各领域得分 = 命中该领域的仓库权重之和
+        domain_scores = weights @ matrix
         
         # 标准化分数
+        total_weight = weights.sum()
         if total_weight > 0:
-            for domain in domain_scores:
-                domain_scores[domain] /= total_weight
+            domain_scores = domain_scores / total_weight
+        
+        # 只返回至少有一个仓库命中的领域
+        matched = matrix.any(axis=0)
+        return {
+            domain: float(domain_scores[index])
+            for domain, index in self._domain_index.items()
+            if matched[index]
+        }
+    
+    def _build_matrix(self, repositories: List[Dict]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        构建仓库-领域矩阵
+        返回：(M[仓库, 领域] 布尔矩阵, 仓库权重向量)
+        """
+        matrix = np.zeros((len(repositories), len(self._domain_index)), dtype=bool)
+        for row, repo in enumerate(repositories):
+            for domain in self._analyze_repo_domains(repo):
+                matrix[row, self._domain_index[domain]] = True
         
-        return dict(domain_scores)
+        return matrix, self._calculate_repo_weights(repositories)
     
     def _analyze_repo_domains(self, repo: Dict) -> Set[str]:
         """
@@ -53,38 +94,29 @@ class DomainClassifier:
             
         return domains
     
-    def _calculate_repo_weight(self, repo: Dict) -> float:
+    def _calculate_repo_weights(self, repositories: List[Dict]) -> np.ndarray:
         """
-        计算仓库权重
+        计算仓库权重（基于star数量）
         """
-        return min(100, repo.get('stars', 0) / 100)  # 标准化到0-100
+        stars = np.array([repo.get('stars', 0) for repo in repositories], dtype=float)
+        return np.minimum(100, stars / 100)  # 标准化到0-100
     
-    def _init_domain_keywords(self) -> Dict[str, List[str]]:
+    def _build_topic_automaton(self) -> ahocorasick.Automaton:
         """
-        初始化领域关键词映射
+        构建关键词 -> 领域的 Aho-Corasick 自动机
+        每个主题只需扫描一次即可匹配全部关键词
         """
-        return {
-            "Frontend": ["javascript", "typescript", "react", "vue", "angular", "web"],
-            "Backend": ["python", "java", "golang", "nodejs", "django", "spring"],
-            "Mobile": ["android", "ios", "flutter", "react-native", "mobile"],
-            "DevOps": ["docker", "kubernetes", "aws", "cicd", "jenkins"],
-            "AI/ML": ["machine-learning", "deep-learning", "tensorflow", "pytorch"],
-            "Security": ["security", "cryptography", "encryption", "penetration"],
-            "Database": ["mysql", "postgresql", "mongodb", "redis", "elasticsearch"],
-        }
+        automaton = ahocorasick.Automaton()
+        for keyword, domains in _KEYWORD_TO_DOMAINS.items():
+            automaton.add_word(keyword, domains)
+        automaton.make_automaton()
+        return automaton
     
-    def _classify_by_language(self, language: str) -> Set[str]:
+    def _classify_by_language(self, language: str) -> Tuple[str, ...]:
         """
         基于编程语言判断技术领域
         """
-        language = language.lower()
-        domains = set()
-        
-        for domain, keywords in self.domain_keywords.items():
-            if language in keywords:
-                domains.add(domain)
-                
-        return domains
+        return _KEYWORD_TO_DOMAINS.get(language.lower(), ())
     
     def _classify_by_topics(self, topics: List[str]) -> Set[str]:
         """
@@ -93,9 +125,10 @@ class DomainClassifier:
         domains = set()
         
         for topic in topics:
-            topic = topic.lower()
-            for domain, keywords in self.domain_keywords.items():
-                if any(keyword in topic for keyword in keywords):
-                    domains.add(domain)
+            for _, keyword_domains in self._topic_automaton.iter(topic.lower()):
+                domains.update(keyword_domains)
                     
-        return domains 
\ No newline at end of file
+        return domains
+
+# 全局共享实例，关键词自动机只在导入时构建一次
+domain_classifier = DomainClassifier()
@@ -1,6 +1,8 @@
 from typing import Dict, List, Tuple
 import numpy as np
 from collections import Counter
+from functools import lru_cache
+import ahocorasick
 
 class NationPredictor:
     """
@@ -9,6 +11,9 @@ class NationPredictor:
     
     def __init__(self):
         self.location_mapping = self._load_location_mapping()
+        self._location_automaton = self._build_location_automaton()
+        # 关系网络中大量用户的位置字符串相同，缓存映射结果
+        self._map_location_to_nation = lru_cache(maxsize=100_000)(self._map_location_to_nation)
     
     def predict_nation(self, 
                       developer_location: str,
@@ -30,15 +35,23 @@ class NationPredictor:
         """
         基于关系网络位置信息进行预测
         """
+        nation, confidence, _ = self.network_consensus(network_locations)
+        return nation, confidence
+    
+    def network_consensus(self, network_locations: List[str]) -> Tuple[str, float, int]:
+        """
+        统计关系网络位置信息中占比最高的国家/地区
+        返回：(国家/地区, 置信度, 能映射到国家/地区的位置数)
+        """
         # 过滤并映射位置信息
         mapped_nations = [
-            self._map_location_to_nation(loc) 
-            for loc in network_locations 
-            if loc and self._map_location_to_nation(loc)
+            nation
+            for nation in map(self._map_location_to_nation, network_locations)
+            if nation
         ]
         
         if not mapped_nations:
-            return "Unknown", 0.0
+            return "Unknown", 0.0, 0
             
         # 统计出现频率最高的国家/地区
         nation_counts = Counter(mapped_nations)
@@ -48,7 +61,7 @@ class NationPredictor:
         nation = most_common[0]
         confidence = most_common[1] / total_valid
         
-        return nation, confidence
+        return nation, confidence, total_valid
     
     def _map_location_to_nation(self, location: str) -> str:
         """
@@ -59,12 +72,26 @@ class NationPredictor:
             
         location = location.lower().strip()
         
-        # 使用预定义的映射关系
-        for nation, keywords in self.location_mapping.items():
-            if any(keyword in location for keyword in keywords):
-                return nation
-                
-        return None
+        # 使用预定义的映射关系，多个国家命中时按映射表顺序取第一个
+        matches = [value for _, value in self._location_automaton.iter(location)]
+        if not matches:
+            return None
+            
+        return min(matches)[1]
+    
+    def _build_location_automaton(self) -> ahocorasick.Automaton:
+        """
+        构建关键词 -> (优先级, 国家/地区) 的 Aho-Corasick 自动机
+        """
+        automaton = ahocorasick.Automaton()
+        for priority, (nation, keywords) in enumerate(self.location_mapping.items()):
+            for keyword in keywords:
+                keyword = keyword.lower()
+                # 同一关键词出现在多个国家时保留映射表中靠前的
+                if keyword not in automaton:
+                    automaton.add_word(keyword, (priority, nation))
+        automaton.make_automaton()
+        return automaton
     
     def _load_location_mapping(self) -> Dict[str, List[str]]:
         """
@@ -76,4 +103,7 @@ class NationPredictor:
             "India": ["india", "bangalore", "mumbai", "delhi"],
             "United Kingdom": ["uk", "united kingdom", "london", "manchester"],
             # 可以继续添加更多国家/地区的映射
-        } 
\ No newline at end of file
+        }
+
+# 全局共享实例，位置自动机与映射缓存在所有请求间复用
+nation_predictor = NationPredictor()
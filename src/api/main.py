@@ -1,12 +1,16 @@
 from fastapi import FastAPI, HTTPException, Query, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from typing import Optional, List
+from typing import Dict, Optional, List, Tuple
 from pydantic import BaseModel
 from motor.motor_asyncio import AsyncIOMotorClient
+import asyncio
 import logging
+import time
 from datetime import datetime, timedelta
 
 from ..services.developer_analyzer import DeveloperAnalyzer, DeveloperAnalysis
+from ..data.etag_store import MongoETagStore
+from ..data.response_cache import ResponseCache
 from ..config import settings
 
 # 配置日志
@@ -38,6 +42,14 @@ app.add_middleware(
 # 数据库连接
 db = None
 
+# 进行中的分析请求：(用户名, 是否强制刷新) -> 任务
+_inflight_requests: Dict[Tuple[str, bool], asyncio.Task] = {}
+
+# /stats 结果缓存，开发者数据每次写入都会递增 _stats_version 使缓存失效
+STATS_CACHE_TTL = 60  # 缓存有效期（秒）
+_stats_cache: Dict[str, object] = {}
+_stats_version = 0
+
 @app.on_event("startup")
 async def startup_db_client():
     """
@@ -48,6 +60,14 @@ async def startup_db_client():
         client = AsyncIOMotorClient(settings.mongodb_url)
         db = client[settings.database_name]
         logger.info("数据库连接成功")
+        
+        # 全局共享的分析服务，复用 GitHub 连接池与缓存
+        app.state.response_cache = ResponseCache.from_url(settings.redis_url) if settings.redis_url else None
+        app.state.analyzer = DeveloperAnalyzer(
+            settings.github_token,
+            etag_store=MongoETagStore(db.github_etags),
+            response_cache=app.state.response_cache
+        )
     except Exception as e:
         logger.error(f"数据库连接失败: {str(e)}")
         raise
@@ -57,13 +77,17 @@ async def shutdown_db_client():
     """
     关闭时断开数据库连接
     """
+    if getattr(app.state, "analyzer", None):
+        await app.state.analyzer.close()
+    if getattr(app.state, "response_cache", None):
+        await app.state.response_cache.close()
     if db:
         db.client.close()
         logger.info("数据库连接已关闭")
 
 # 依赖注入
-def get_analyzer():
-    return DeveloperAnalyzer(settings.github_token)
+def get_analyzer() -> DeveloperAnalyzer:
+    return app.state.analyzer
 
 # API 模型
 class DeveloperResponse(BaseModel):
@@ -75,6 +99,9 @@ class DeveloperResponse(BaseModel):
     profile: dict
     last_updated: datetime
 
+# 搜索结果只需要 DeveloperResponse 的字段
+SEARCH_PROJECTION = {"_id": 0, **{field: 1 for field in DeveloperResponse.model_fields}}
+
 class SearchResponse(BaseModel):
     total: int
     developers: List[DeveloperResponse]
@@ -100,42 +127,69 @@ async def analyze_developer(
     - force_refresh: 是否强制刷新缓存数据
     """
     try:
-        # 检查缓存
-        if not force_refresh:
-            cached_data = await db.developers.find_one({"username": username})
-            if cached_data and (datetime.now() - cached_data["last_updated"]) < timedelta(seconds=settings.cache_ttl):
-                logger.info(f"返回缓存数据: {username}")
-                return DeveloperResponse(**cached_data)
-        
-        # 分析开发者数据
-        logger.info(f"开始分析开发者: {username}")
-        analysis = await analyzer.analyze_developer(username)
-        
-        # 转换为可序列化的字典
-        developer_data = {
-            "username": analysis.username,
-            "talent_rank": analysis.talent_rank,
-            "nation": analysis.nation,
-            "nation_confidence": analysis.nation_confidence,
-            "domains": analysis.domains,
-            "profile": analysis.profile.__dict__,
-            "last_updated": analysis.last_updated
-        }
+        # 相同参数的并发请求共享同一次计算
+        key = (username, force_refresh)
+        task = _inflight_requests.get(key)
+        if task is None:
+            task = asyncio.create_task(_load_developer(username, force_refresh, analyzer))
+            _inflight_requests[key] = task
+            task.add_done_callback(lambda _: _inflight_requests.pop(key, None))
         
-        # 更新数据库
-        await db.developers.update_one(
-            {"username": username},
-            {"$set": developer_data},
-            upsert=True
-        )
-        
-        logger.info(f"开发者分析完成: {username}")
-        return DeveloperResponse(**developer_data)
+        # shield 防止某个客户端断开时取消其他请求共享的任务
+        return await asyncio.shield(task)
         
     except Exception as e:
         logger.error(f"分析开发者失败 {username}: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+async def _load_developer(username: str, force_refresh: bool,
+                          analyzer: DeveloperAnalyzer) -> DeveloperResponse:
+    """
+    读取缓存或重新分析开发者，并写回数据库
+    """
+    # 检查缓存
+    cached_data = None
+    if not force_refresh:
+        cached_data = await db.developers.find_one({"username": username})
+        if cached_data and (datetime.now() - cached_data["last_updated"]) < timedelta(seconds=settings.cache_ttl):
+            logger.info(f"返回缓存数据: {username}")
+            return DeveloperResponse(**cached_data)
+    
+    # 分析开发者数据
+    logger.info(f"开始分析开发者: {username}")
+    analysis = await analyzer.analyze_developer(username, force_refresh=force_refresh)
+    
+    # 转换为可序列化的字典
+    developer_data = {
+        "username": analysis.username,
+        "talent_rank": analysis.talent_rank,
+        "nation": analysis.nation,
+        "nation_confidence": analysis.nation_confidence,
+        "domains": analysis.domains,
+        "profile": analysis.profile.__dict__,
+        "last_updated": analysis.last_updated
+    }
+    
+    # 更新数据库，已有缓存时只写入发生变化的字段
+    if cached_data:
+        update_fields = {
+            key: value for key, value in developer_data.items()
+            if cached_data.get(key) != value
+        }
+    else:
+        update_fields = developer_data
+    await db.developers.update_one(
+        {"username": username},
+        {"$set": update_fields},
+        upsert=True
+    )
+    
+    global _stats_version
+    _stats_version += 1
+    
+    logger.info(f"开发者分析完成: {username}")
+    return DeveloperResponse(**developer_data)
+
 @app.get("/api/v1/search", response_model=SearchResponse)
 async def search_developers(
     domain: Optional[str] = Query(None, description="技术领域"),
@@ -160,15 +214,14 @@ async def search_developers(
             
         # 执行查询
         total = await db.developers.count_documents(query)
-        cursor = db.developers.find(query) \
+        # 只返回响应需要的字段，索引由查询优化器按筛选条件选择
+        cursor = db.developers.find(query, projection=SEARCH_PROJECTION) \
             .sort("talent_rank", -1) \
             .skip(offset) \
             .limit(limit)
             
-        # 收集结果
-        developers = []
-        async for doc in cursor:
-            developers.append(DeveloperResponse(**doc))
+        # 收集结果，数据库中的文档由本服务写入，跳过重复校验
+        developers = [DeveloperResponse.model_construct(**doc) async for doc in cursor]
             
         logger.info(f"搜索完成: 找到 {total} 个开发者")
         return SearchResponse(
@@ -186,29 +239,63 @@ async def get_statistics():
     获取系统统计信息
     """
     try:
-        pipeline = [
-            {"$group": {
-                "_id": None,
-                "avg_rank": {"$avg": "$talent_rank"},
-                "total": {"$sum": 1}
-            }}
-        ]
-        
-        stats = await db.developers.aggregate(pipeline).next()
-        nations = await db.developers.distinct("nation")
-        domains = await db.developers.distinct("domains")
-        
-        logger.info("统计信息获取成功")
-        return StatsResponse(
-            total_developers=stats["total"],
-            nations=nations,
-            domains=list(domains.keys()),
-            avg_rank=stats["avg_rank"]
-        )
+        return await _compute_stats()
     except Exception as e:
         logger.error(f"获取统计信息失败: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+async def _compute_stats() -> StatsResponse:
+    """
+    统计全部开发者数据
+    结果缓存 STATS_CACHE_TTL 秒，期间有开发者数据写入时提前失效
+    """
+    cached = _stats_cache.get("value")
+    if cached and _stats_cache["version"] == _stats_version and time.monotonic() < _stats_cache["expires_at"]:
+        return cached
+    
+    version = _stats_version
+    
+    # 一次聚合同时统计总数、平均分、国家列表和领域列表
+    pipeline = [
+        {"$facet": {
+            "stats": [
+                {"$group": {
+                    "_id": None,
+                    "avg_rank": {"$avg": "$talent_rank"},
+                    "total": {"$sum": 1}
+                }}
+            ],
+            "nations": [
+                {"$group": {"_id": "$nation"}}
+            ],
+            "domains": [
+                {"$project": {"domain": {"$objectToArray": "$domains"}}},
+                {"$unwind": "$domain"},
+                {"$group": {"_id": "$domain.k"}}
+            ]
+        }}
+    ]
+    
+    result = await db.developers.aggregate(pipeline).next()
+    stats = result["stats"][0] if result["stats"] else {"total": 0, "avg_rank": 0.0}
+    nations = sorted(doc["_id"] for doc in result["nations"] if doc["_id"])
+    domains = sorted(doc["_id"] for doc in result["domains"])
+    
+    logger.info("统计信息获取成功")
+    stats_response = StatsResponse(
+        total_developers=stats["total"],
+        nations=nations,
+        domains=domains,
+        avg_rank=stats["avg_rank"]
+    )
+    
+    _stats_cache.update(
+        value=stats_response,
+        version=version,
+        expires_at=time.monotonic() + STATS_CACHE_TTL
+    )
+    return stats_response
+
 # 错误处理
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
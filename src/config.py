@@ -1,3 +1,4 @@
+from typing import Optional
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -14,6 +15,7 @@ class Settings(BaseSettings):
     
     # 缓存配置
     cache_ttl: int = 3600  # 缓存有效期（秒）
+    redis_url: Optional[str] = None  # GitHub 中间结果缓存，未配置时不启用
     
     class Config:
         env_file = ".env"
@@ -0,0 +1,61 @@
+from typing import Any, Dict, Optional, Tuple
+from datetime import datetime, timezone
+from cachetools import LRUCache
+
+# (ETag, 响应数据, Link 头)
+ETagEntry = Tuple[str, Any, Dict]
+
+class ETagStore:
+    """
+    GitHub 条件请求的 ETag 存储
+    默认保存在进程内存中
+    """
+    
+    def __init__(self, maxsize: int = 10_000):
+        self._entries = LRUCache(maxsize=maxsize)
+    
+    async def get(self, url: str) -> Optional[ETagEntry]:
+        """
+        获取 URL 对应的 ETag 及缓存的响应
+        """
+        return self._entries.get(url)
+    
+    async def set(self, url: str, etag: str, payload: Any, links: Dict):
+        """
+        保存 URL 对应的 ETag 及响应
+        """
+        self._entries[url] = (etag, payload, links)
+
+class MongoETagStore(ETagStore):
+    """
+    基于 MongoDB 的 ETag 存储，服务重启后仍可复用
+    条目在最后一次写入 ttl 秒后由 TTL 索引自动清理，索引由 scripts/create_indexes.py 创建
+    """
+    
+    def __init__(self, collection, ttl: int = 7 * 86400):
+        self.collection = collection
+        self.ttl = ttl
+    
+    async def ensure_indexes(self):
+        """
+        创建 updated_at 上的 TTL 索引，已存在时不会重复创建
+        """
+        await self.collection.create_index("updated_at", expireAfterSeconds=self.ttl)
+    
+    async def get(self, url: str) -> Optional[ETagEntry]:
+        doc = await self.collection.find_one({"_id": url})
+        if not doc:
+            return None
+        return doc["etag"], doc["payload"], doc["links"]
+    
+    async def set(self, url: str, etag: str, payload: Any, links: Dict):
+        await self.collection.update_one(
+            {"_id": url},
+            {"$set": {
+                "etag": etag,
+                "payload": payload,
+                "links": links,
+                "updated_at": datetime.now(timezone.utc)
+            }},
+            upsert=True
+        )
@@ -1,7 +1,17 @@
-from typing import Dict, List, Optional
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
 from dataclasses import dataclass
-from github import Github
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from urllib.parse import parse_qs, urlparse
+import asyncio
+import logging
+import httpx
+from cachetools import TTLCache
+from redis.exceptions import RedisError
+
+from .etag_store import ETagStore
+from .response_cache import ResponseCache
+
+logger = logging.getLogger(__name__)
 
 @dataclass
 class DeveloperProfile:
@@ -14,74 +24,467 @@ class DeveloperProfile:
     followers: List[str]
     following: List[str]
 
+# 统计指定用户在仓库中已关闭/合并的 PR 数及其评审数
+_REVIEW_COUNT_QUERY = (
+    'query($owner: String!, $name: String!, $login: String!, $cursor: String) { '
+    'repository(owner: $owner, name: $name) { '
+    'pullRequests(states: [OPEN, CLOSED, MERGED], first: 100, after: $cursor, '
+    'orderBy: {field: UPDATED_AT, direction: DESC}) { '
+    'pageInfo { hasNextPage endCursor } '
+    'nodes { updatedAt state author { login } reviews(first: 1, author: $login) { totalCount } } } } }'
+)
+
 class GitHubDataCollector:
-    def __init__(self, access_token: str):
+    """
+    GitHub 数据采集器
+    基于 httpx.AsyncClient 的异步 REST / GraphQL 实现
+    """
+    
+    API_URL = "https://api.github.com"
+    
+    # 进程内的开发者快照与位置缓存：最多缓存的条目数与有效期（秒）
+    SNAPSHOT_CACHE_SIZE = 1_000
+    LOCATION_CACHE_SIZE = 100_000
+    CACHE_TTL = 3600
+    
+    def __init__(self, access_token: str, etag_store: Optional[ETagStore] = None,
+                 response_cache: Optional[ResponseCache] = None):
         """
         初始化 GitHub 数据采集器
+        etag_store 用于 REST 条件请求（分析时即贡献统计请求），未指定时保存在内存中
+        response_cache 用于缓存贡献和位置等中间结果，未指定或 Redis 不可用时直接请求 GitHub
         """
-        self.github = Github(access_token)
+        # 长连接复用 TLS 会话，HTTP/2 在同一连接上多路复用并发请求
+        self.client = httpx.AsyncClient(
+            base_url=self.API_URL,
+            headers={
+                "Authorization": f"Bearer {access_token}",
+                "Accept": "application/vnd.github+json"
+            },
+            http2=True,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=100),
+            timeout=30.0
+        )
+        self._snapshot_cache = TTLCache(maxsize=self.SNAPSHOT_CACHE_SIZE, ttl=self.CACHE_TTL)
+        self._location_cache = TTLCache(maxsize=self.LOCATION_CACHE_SIZE, ttl=self.CACHE_TTL)
+        self._inflight_fetches: Dict[Hashable, asyncio.Task] = {}
+        self.etag_store = etag_store or ETagStore()
+        self.response_cache = response_cache
+    
+    async def close(self):
+        """
+        关闭底层 HTTP 连接
+        """
+        await self.client.aclose()
         
-    def get_developer_profile(self, username: str) -> DeveloperProfile:
+    async def get_developer_profile(self, username: str) -> DeveloperProfile:
         """
         获取开发者基础信息
         """
-        user = self.github.get_user(username)
+        user, _ = await self._get(f"/users/{username}")
+        repositories, followers, following = await asyncio.gather(
+            self._get_all(f"/users/{username}/repos"),
+            self._get_all(f"/users/{username}/followers"),
+            self._get_all(f"/users/{username}/following")
+        )
         return DeveloperProfile(
-            username=user.login,
-            name=user.name,
-            location=user.location,
-            blog=user.blog,
-            bio=user.bio,
-            repositories=[repo.full_name for repo in user.get_repos()],
-            followers=[follower.login for follower in user.get_followers()],
-            following=[following.login for following in user.get_following()]
+            username=user['login'],
+            name=user['name'],
+            location=user['location'],
+            blog=user['blog'],
+            bio=user['bio'],
+            repositories=[repo['full_name'] for repo in repositories],
+            followers=[follower['login'] for follower in followers],
+            following=[following['login'] for following in following]
         )
     
-    def get_repository_metrics(self, repo_name: str) -> Dict:
+    async def get_repository_metrics(self, repo_name: str) -> Dict:
         """
         获取仓库指标数据
         """
-        repo = self.github.get_repo(repo_name)
+        repo, _ = await self._get(f"/repos/{repo_name}")
         return {
-            'stars': repo.stargazers_count,
-            'forks': repo.forks_count,
-            'watchers': repo.watchers_count,
-            'created_at': repo.created_at,
-            'updated_at': repo.updated_at,
-            'language': repo.language,
-            'topics': repo.get_topics()
+            'stars': repo['stargazers_count'],
+            'forks': repo['forks_count'],
+            'watchers': repo['watchers_count'],
+            'created_at': _parse_datetime(repo['created_at']),
+            'updated_at': _parse_datetime(repo['updated_at']),
+            'last_commit_at': _parse_datetime(repo['pushed_at']),
+            'language': repo['language'],
+            'topics': repo.get('topics', [])
         }
     
-    def get_developer_contributions(self, username: str, repo_name: str) -> Dict:
+    async def get_developer_contributions(self, username: str, repo_name: str,
+                                          use_cache: bool = True) -> Dict:
         """
         获取开发者在特定仓库的贡献数据
         """
-        repo = self.github.get_repo(repo_name)
-        user = self.github.get_user(username)
-        
-        # 获取最近一年的贡献
-        one_year_ago = datetime.now() - timedelta(days=365)
+        return await self._cached_response(
+            'contrib', f"{username}@{repo_name}",
+            lambda: self._fetch_developer_contributions(username, repo_name),
+            use_cache
+        )
+    
+    async def _fetch_developer_contributions(self, username: str, repo_name: str) -> Dict:
+        """
+        统计开发者在特定仓库的贡献数据
+        """
+        # 获取最近一年的贡献，起点取整到当天零点，使同一天内的请求 URL 不变，可用 ETag 重新验证
+        one_year_ago = (datetime.now(timezone.utc) - timedelta(days=365)).replace(
+            hour=0, minute=0, second=0, microsecond=0
+        )
+        since = one_year_ago.strftime('%Y-%m-%dT%H:%M:%SZ')
         
-        commits = repo.get_commits(author=user, since=one_year_ago)
-        issues = repo.get_issues(creator=username, state='closed', since=one_year_ago)
-        pulls = repo.get_pulls(state='closed', creator=username)
+        commits, issues, (pulls, reviews) = await asyncio.gather(
+            self._count(f"/repos/{repo_name}/commits", {'author': username, 'since': since}),
+            self._count(f"/repos/{repo_name}/issues", {'creator': username, 'state': 'closed', 'since': since}),
+            self._get_pull_request_stats(repo_name, username, one_year_ago)
+        )
         
         return {
-            'commits_count': commits.totalCount,
-            'resolved_issues': issues.totalCount,
-            'pull_requests': pulls.totalCount,
-            'code_reviews': self._get_review_count(repo, username, one_year_ago)
+            'commits_count': commits,
+            'resolved_issues': issues,
+            'pull_requests': pulls,
+            'code_reviews': reviews
         }
     
-    def _get_review_count(self, repo, username: str, since: datetime) -> int:
+    async def _get_pull_request_stats(self, repo_name: str, username: str,
+                                      since: datetime) -> Tuple[int, int]:
         """
-        获取代码评审次数
+        获取已关闭/合并的 PR 数与代码评审次数
+        PR 按更新时间倒序分页，评审按作者在服务端过滤，早于 since 的 PR 不再翻页
+        返回：(PR 数, 评审次数)
         """
+        owner, name = repo_name.split('/', 1)
+        login = username.lower()
+        pulls_count = 0
         reviews_count = 0
-        pulls = repo.get_pulls(state='all')
-        for pull in pulls:
-            if pull.created_at < since:
-                continue
-            reviews = pull.get_reviews()
-            reviews_count += sum(1 for review in reviews if review.user.login == username)
-        return reviews_count 
\ No newline at end of file
+        cursor = None
+        while True:
+            data = await self._execute(_REVIEW_COUNT_QUERY, {
+                'owner': owner,
+                'name': name,
+                'login': username,
+                'cursor': cursor
+            })
+            pull_requests = data['repository']['pullRequests']
+            for pull in pull_requests['nodes']:
+                if _parse_datetime(pull['updatedAt']) < since:
+                    return pulls_count, reviews_count
+                author = pull['author'] or {}
+                if pull['state'] != 'OPEN' and (author.get('login') or '').lower() == login:
+                    pulls_count += 1
+                reviews_count += pull['reviews']['totalCount']
+            
+            if not pull_requests['pageInfo']['hasNextPage']:
+                return pulls_count, reviews_count
+            cursor = pull_requests['pageInfo']['endCursor']
+    
+    async def _execute(self, query: str, variables: Dict, ignore_not_found: bool = False) -> Dict:
+        """
+        执行 GraphQL 查询
+        ignore_not_found 为 True 时，用户不存在的错误不视为失败，对应字段为 null
+        """
+        response = await self.client.post(
+            "/graphql",
+            json={'query': query, 'variables': variables}
+        )
+        response.raise_for_status()
+        payload = response.json()
+        errors = payload.get('errors') or []
+        if ignore_not_found:
+            errors = [error for error in errors if error.get('type') != 'NOT_FOUND']
+        if errors:
+            raise RuntimeError(f"GitHub GraphQL 查询失败: {errors}")
+        return payload['data']
+    
+    async def _single_flight(self, cache: TTLCache, key: Hashable,
+                             fetch: Callable[[], Awaitable], use_cache: bool = True):
+        """
+        带缓存的单飞请求
+        同一 key 的并发请求只会触发一次 fetch，其余请求等待同一任务并复用结果
+        """
+        if use_cache and key in cache:
+            return cache[key]
+        
+        task = self._inflight_fetches.get(key)
+        if task is None:
+            async def run():
+                value = await fetch()
+                cache[key] = value
+                return value
+            
+            task = asyncio.create_task(run())
+            self._inflight_fetches[key] = task
+            task.add_done_callback(lambda _: self._inflight_fetches.pop(key, None))
+        # 单个调用方被取消时不影响其他等待者
+        return await asyncio.shield(task)
+    
+    async def _cached_response(self, kind: str, key: str, fetch: Callable[[], Awaitable],
+                               use_cache: bool = True):
+        """
+        先查 Redis 响应缓存，未命中时请求 GitHub 并写回
+        use_cache 为 False 时跳过读取，但仍会刷新缓存；Redis 出错时直接请求 GitHub
+        """
+        if self.response_cache is None:
+            return await fetch()
+        
+        if use_cache:
+            try:
+                cached = await self.response_cache.get(kind, key)
+            except RedisError as e:
+                logger.warning(f"读取响应缓存失败 {kind}:{key}: {str(e)}")
+                cached = None
+            if cached is not None:
+                return cached
+        
+        value = await fetch()
+        try:
+            await self.response_cache.set(kind, key, value)
+        except RedisError as e:
+            logger.warning(f"写入响应缓存失败 {kind}:{key}: {str(e)}")
+        return value
+    
+    async def _get(self, path: str, params: Optional[Dict] = None) -> Tuple[Any, Dict]:
+        """
+        发送带 If-None-Match 的条件 GET 请求
+        返回：(JSON 数据, Link 头)
+        未变化时 GitHub 返回 304，不消耗限流配额，直接复用缓存的响应
+        """
+        url = str(self.client.build_request("GET", path, params=params).url)
+        cached = await self.etag_store.get(url)
+        headers = {"If-None-Match": cached[0]} if cached else None
+        
+        response = await self.client.get(url, headers=headers)
+        if cached and response.status_code == 304:
+            return cached[1], cached[2]
+        response.raise_for_status()
+        
+        payload = response.json()
+        links = {rel: {'url': link['url']} for rel, link in response.links.items()}
+        etag = response.headers.get("ETag")
+        if etag:
+            await self.etag_store.set(url, etag, payload, links)
+        return payload, links
+    
+    async def _get_all(self, path: str, params: Optional[Dict] = None) -> List[Dict]:
+        """
+        按 Link 头逐页获取列表接口的全部数据
+        """
+        items, links = await self._get(path, {**(params or {}), 'per_page': 100})
+        items = list(items)
+        while 'next' in links:
+            page, links = await self._get(links['next']['url'])
+            items.extend(page)
+        return items
+    
+    async def _count(self, path: str, params: Dict) -> int:
+        """
+        统计列表接口的条目总数
+        每页 1 条时，Link 头中 last 页码即为总数
+        """
+        try:
+            items, links = await self._get(path, {**params, 'per_page': 1})
+        except httpx.HTTPStatusError as e:
+            # 空仓库的提交列表返回 409
+            if e.response.status_code == 409:
+                return 0
+            raise
+        if 'last' in links:
+            query = parse_qs(urlparse(links['last']['url']).query)
+            return int(query['page'][0])
+        return len(items)
+
+def _parse_datetime(value: Optional[str]) -> Optional[datetime]:
+    """
+    解析 GitHub 返回的 ISO 8601 时间字符串
+    """
+    if not value:
+        return None
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+# 分页连接的查询片段，首次查询时 $cursor 为 null
+_CONNECTION_FIELDS = {
+    'followers': 'followers(first: 100, after: $cursor) { pageInfo { hasNextPage endCursor } nodes { ...NeighborFields } }',
+    'following': 'following(first: 100, after: $cursor) { pageInfo { hasNextPage endCursor } nodes { ...NeighborFields } }',
+    'repositories': 'repositories(first: 100, after: $cursor, ownerAffiliations: OWNER, privacy: PUBLIC) { pageInfo { hasNextPage endCursor } nodes { ...RepositoryFields } }',
+}
+
+_FRAGMENTS = {
+    'NeighborFields': 'fragment NeighborFields on User { login followers { totalCount } }',
+    'RepositoryFields': (
+        'fragment RepositoryFields on Repository { '
+        'nameWithOwner stargazerCount forkCount createdAt updatedAt '
+        'watchers { totalCount } primaryLanguage { name } '
+        'repositoryTopics(first: 20) { nodes { topic { name } } } '
+        'defaultBranchRef { target { ... on Commit { committedDate } } } }'
+    ),
+}
+
+class GraphQLGitHubCollector(GitHubDataCollector):
+    """
+    基于 GitHub GraphQL API 的数据采集器
+    一次查询获取开发者信息与仓库指标，关系网络位置通过别名查询批量获取
+    """
+    
+    # 单次别名查询包含的用户数
+    LOCATION_BATCH_SIZE = 100
+    
+    async def get_developer_snapshot(self, username: str, use_cache: bool = True) -> Dict:
+        """
+        获取开发者快照
+        返回：{
+            'profile': DeveloperProfile,
+            'repositories': {仓库名: 仓库指标}
+        }
+        """
+        return await self._single_flight(
+            self._snapshot_cache,
+            ('snapshot', username),
+            lambda: self._fetch_developer_snapshot(username),
+            use_cache
+        )
+    
+    async def _fetch_developer_snapshot(self, username: str) -> Dict:
+        """
+        通过 GraphQL 查询获取开发者快照
+        """
+        connections = list(_CONNECTION_FIELDS)
+        user = await self._query_user(username, connections, include_profile=True)
+        
+        # 按 endCursor 分页获取剩余节点
+        nodes = {}
+        for connection in connections:
+            nodes[connection] = list(user[connection]['nodes'])
+            page_info = user[connection]['pageInfo']
+            while page_info['hasNextPage']:
+                page = await self._query_user(username, [connection], cursor=page_info['endCursor'])
+                nodes[connection].extend(page[connection]['nodes'])
+                page_info = page[connection]['pageInfo']
+        
+        # 已删除的账号会以 null 节点返回
+        for connection in connections:
+            nodes[connection] = [node for node in nodes[connection] if node]
+        
+        # 关注者/被关注者按其自身关注者数降序，便于优先查询更有代表性的用户
+        for connection in ('followers', 'following'):
+            nodes[connection].sort(key=lambda node: node['followers']['totalCount'], reverse=True)
+        
+        repositories = {
+            repo['nameWithOwner']: self._parse_repository(repo)
+            for repo in nodes['repositories']
+        }
+        profile = DeveloperProfile(
+            username=user['login'],
+            name=user['name'],
+            location=user['location'],
+            blog=user['websiteUrl'],
+            bio=user['bio'],
+            repositories=list(repositories),
+            followers=[node['login'] for node in nodes['followers']],
+            following=[node['login'] for node in nodes['following']]
+        )
+        return {
+            'profile': profile,
+            'repositories': repositories
+        }
+    
+    async def get_locations_bulk(self, logins: List[str], use_cache: bool = True) -> Dict[str, Optional[str]]:
+        """
+        批量获取用户位置信息
+        依次查询进程内缓存、Redis 响应缓存，剩余用户每 100 个合并为一次别名查询，只请求 location 字段
+        返回：{用户名: 位置}，不存在的用户不会出现在结果中
+        """
+        locations = {}
+        pending = []
+        for login in dict.fromkeys(logins):
+            if use_cache and login in self._location_cache:
+                locations[login] = self._location_cache[login]
+            else:
+                pending.append(login)
+        
+        if use_cache and self.response_cache is not None and pending:
+            try:
+                cached = await self.response_cache.get_many('location', pending)
+            except RedisError as e:
+                logger.warning(f"批量读取位置缓存失败: {str(e)}")
+                cached = {}
+            locations.update(cached)
+            pending = [login for login in pending if login not in cached]
+        
+        batches = [
+            pending[i:i + self.LOCATION_BATCH_SIZE]
+            for i in range(0, len(pending), self.LOCATION_BATCH_SIZE)
+        ]
+        fetched = {}
+        for batch_locations in await asyncio.gather(*(self._query_locations(batch) for batch in batches)):
+            fetched.update(batch_locations)
+        if self.response_cache is not None:
+            try:
+                await self.response_cache.set_many('location', fetched)
+            except RedisError as e:
+                logger.warning(f"批量写入位置缓存失败: {str(e)}")
+        locations.update(fetched)
+        
+        self._location_cache.update(locations)
+        
+        return locations
+    
+    async def _query_locations(self, logins: List[str]) -> Dict[str, Optional[str]]:
+        """
+        执行一次别名查询：u0: user(login: $u0) { location } ...
+        """
+        variables = {f'u{i}': login for i, login in enumerate(logins)}
+        query = 'query(%s) { %s }' % (
+            ', '.join(f'${alias}: String!' for alias in variables),
+            ' '.join(f'{alias}: user(login: ${alias}) {{ location }}' for alias in variables)
+        )
+        
+        data = await self._execute(query, variables, ignore_not_found=True)
+        return {
+            login: data[alias]['location']
+            for alias, login in variables.items()
+            if data.get(alias) is not None
+        }
+    
+    async def _query_user(self, username: str, connections: List[str],
+                          cursor: Optional[str] = None, include_profile: bool = False) -> Dict:
+        """
+        查询用户的指定分页连接
+        """
+        fields = [_CONNECTION_FIELDS[connection] for connection in connections]
+        if include_profile:
+            fields.insert(0, 'login name location websiteUrl bio')
+        
+        # GraphQL 不允许出现未使用的片段，只附加用到的片段
+        fragments = [
+            fragment for name, fragment in _FRAGMENTS.items()
+            if any(f'...{name}' in field for field in fields)
+        ]
+        query = 'query($login: String!, $cursor: String) { user(login: $login) { %s } } %s' % (
+            ' '.join(fields),
+            ' '.join(fragments)
+        )
+        
+        data = await self._execute(query, {'login': username, 'cursor': cursor})
+        if data.get('user') is None:
+            raise ValueError(f"GitHub 用户不存在: {username}")
+        return data['user']
+    
+    @staticmethod
+    def _parse_repository(repo: Dict) -> Dict:
+        """
+        将 GraphQL 仓库节点转换为与 get_repository_metrics 相同的指标结构
+        """
+        return {
+            'stars': repo['stargazerCount'],
+            'forks': repo['forkCount'],
+            'watchers': repo['watchers']['totalCount'],
+            'created_at': _parse_datetime(repo['createdAt']),
+            'updated_at': _parse_datetime(repo['updatedAt']),
+            'last_commit_at': _parse_datetime(
+                ((repo['defaultBranchRef'] or {}).get('target') or {}).get('committedDate')
+            ),
+            'language': (repo['primaryLanguage'] or {}).get('name'),
+            'topics': [node['topic']['name'] for node in repo['repositoryTopics']['nodes']]
+        }
@@ -0,0 +1,80 @@
+from typing import Any, Dict, Iterable, Optional
+from datetime import date
+import msgpack
+from redis.asyncio import Redis
+
+class ResponseCache:
+    """
+    GitHub 中间结果缓存
+    基于 Redis，使用 msgpack 序列化，键按天分桶：{类型}:{标识}:{日期}
+    """
+    
+    def __init__(self, redis: Redis, ttl: int = 86400):
+        self.redis = redis
+        self.ttl = ttl
+    
+    @classmethod
+    def from_url(cls, url: str, ttl: int = 86400) -> "ResponseCache":
+        """
+        通过 Redis 连接串创建缓存
+        """
+        return cls(Redis.from_url(url), ttl)
+    
+    async def close(self):
+        """
+        关闭 Redis 连接
+        """
+        await self.redis.aclose()
+    
+    async def get(self, kind: str, key: str) -> Optional[Any]:
+        """
+        读取缓存，未命中返回 None
+        """
+        raw = await self.redis.get(self._key(kind, key))
+        if raw is None:
+            return None
+        return self._unpack(raw)
+    
+    async def set(self, kind: str, key: str, value: Any):
+        """
+        写入缓存
+        """
+        await self.redis.set(self._key(kind, key), self._pack(value), ex=self.ttl)
+    
+    async def get_many(self, kind: str, keys: Iterable[str]) -> Dict[str, Any]:
+        """
+        批量读取缓存，只返回命中的条目
+        """
+        keys = list(keys)
+        if not keys:
+            return {}
+        values = await self.redis.mget([self._key(kind, key) for key in keys])
+        return {
+            key: self._unpack(raw)
+            for key, raw in zip(keys, values)
+            if raw is not None
+        }
+    
+    async def set_many(self, kind: str, items: Dict[str, Any]):
+        """
+        批量写入缓存
+        """
+        if not items:
+            return
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for key, value in items.items():
+                pipe.set(self._key(kind, key), self._pack(value), ex=self.ttl)
+            await pipe.execute()
+    
+    @staticmethod
+    def _key(kind: str, key: str) -> str:
+        return f"{kind}:{key}:{date.today().isoformat()}"
+    
+    @staticmethod
+    def _pack(value: Any) -> bytes:
+        # datetime 以 msgpack timestamp 扩展类型存储
+        return msgpack.packb(value, datetime=True)
+    
+    @staticmethod
+    def _unpack(raw: bytes) -> Any:
+        return msgpack.unpackb(raw, timestamp=3)
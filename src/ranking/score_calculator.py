@@ -1,5 +1,19 @@
 from dataclasses import dataclass
 from typing import List, Dict
+import math
+import numpy as np
+
+# 各指标的归一化基准及其对数，避免每次计算时重复求值
+BASELINES = {
+    'stars': 1000,          # 假设1000星为基准
+    'forks': 500,           # 假设500 fork为基准
+    'watchers': 200,        # 假设200 watcher为基准
+    'commits': 100,         # 假设100次提交为基准
+    'resolved_issues': 50,  # 假设50个issue为基准
+    'pull_requests': 30,    # 假设30个PR为基准
+    'code_reviews': 40      # 假设40次评审为基准
+}
+LOG_BASELINES = {name: math.log(baseline + 1) for name, baseline in BASELINES.items()}
 
 @dataclass
 class ProjectMetrics:
@@ -38,14 +52,9 @@ class TalentRankCalculator:
         """
         计算项目重要度得分
         """
-        normalized_stars = self._normalize_value(metrics.stars, 1000)  # 假设1000星为基准
-        normalized_forks = self._normalize_value(metrics.forks, 500)   # 假设500 fork为基准
-        normalized_watchers = self._normalize_value(metrics.watchers, 200)  # 假设200 watcher为基准
-        
-        score = (
-            normalized_stars * self.PROJECT_WEIGHTS['stars'] +
-            normalized_forks * self.PROJECT_WEIGHTS['forks'] +
-            normalized_watchers * self.PROJECT_WEIGHTS['watchers']
+        score = sum(
+            self._normalize_value(getattr(metrics, name), name) * weight
+            for name, weight in self.PROJECT_WEIGHTS.items()
         )
         
         return min(score, 100)  # 限制最高分为100
@@ -54,20 +63,25 @@ class TalentRankCalculator:
         """
         计算开发者贡献度得分
         """
-        normalized_commits = self._normalize_value(metrics.commits, 100)  # 假设100次提交为基准
-        normalized_issues = self._normalize_value(metrics.resolved_issues, 50)  # 假设50个issue为基准
-        normalized_prs = self._normalize_value(metrics.pull_requests, 30)  # 假设30个PR为基准
-        normalized_reviews = self._normalize_value(metrics.code_reviews, 40)  # 假设40次评审为基准
-        
-        score = (
-            normalized_commits * self.DEVELOPER_WEIGHTS['commits'] +
-            normalized_issues * self.DEVELOPER_WEIGHTS['resolved_issues'] +
-            normalized_prs * self.DEVELOPER_WEIGHTS['pull_requests'] +
-            normalized_reviews * self.DEVELOPER_WEIGHTS['code_reviews']
+        score = sum(
+            self._normalize_value(getattr(metrics, name), name) * weight
+            for name, weight in self.DEVELOPER_WEIGHTS.items()
         )
         
         return min(score, 100)  # 限制最高分为100
     
+    def calculate_project_importance_batch(self, metrics: List[ProjectMetrics]) -> np.ndarray:
+        """
+        批量计算项目重要度得分，一次向量运算处理开发者的全部仓库
+        """
+        return self._weighted_batch(metrics, self.PROJECT_WEIGHTS)
+    
+    def calculate_developer_contribution_batch(self, metrics: List[DeveloperMetrics]) -> np.ndarray:
+        """
+        批量计算开发者贡献度得分
+        """
+        return self._weighted_batch(metrics, self.DEVELOPER_WEIGHTS)
+    
     def calculate_final_score(self, project_score: float, contribution_score: float, 
                             activity_factor: float = 1.0) -> float:
         """
@@ -75,12 +89,30 @@ class TalentRankCalculator:
         """
         return (project_score * 0.4 + contribution_score * 0.6) * activity_factor
     
+    def _weighted_batch(self, metrics: List, weights: Dict[str, float]) -> np.ndarray:
+        """
+        按列归一化各指标并加权求和
+        """
+        score = np.zeros(len(metrics))
+        for name, weight in weights.items():
+            values = np.array([getattr(m, name) for m in metrics], dtype=float)
+            score += self._normalize_array(values, name) * weight
+        
+        return np.minimum(score, 100)  # 限制最高分为100
+    
     @staticmethod
-    def _normalize_value(value: int, baseline: int) -> float:
+    def _normalize_value(value: int, metric: str) -> float:
         """
         归一化数值，使用对数函数平滑大数值
         """
-        import math
         if value <= 0:
             return 0
-        return min(100, (math.log(value + 1) / math.log(baseline + 1)) * 100) 
\ No newline at end of file
+        return min(100, (math.log(value + 1) / LOG_BASELINES[metric]) * 100)
+    
+    @staticmethod
+    def _normalize_array(values: np.ndarray, metric: str) -> np.ndarray:
+        """
+        向量化的 _normalize_value
+        """
+        normalized = np.log1p(np.maximum(values, 0)) / LOG_BASELINES[metric] * 100
+        return np.minimum(100, normalized)
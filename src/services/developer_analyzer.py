@@ -1,11 +1,15 @@
-from typing import Dict, List, Optional
+from typing import Awaitable, Dict, List, Optional, Tuple
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import datetime, timezone
+import asyncio
+import numpy as np
 
-from ..data.github_collector import GitHubDataCollector, DeveloperProfile
+from ..data.github_collector import GraphQLGitHubCollector, DeveloperProfile
+from ..data.etag_store import ETagStore
+from ..data.response_cache import ResponseCache
 from ..ranking.score_calculator import TalentRankCalculator, ProjectMetrics, DeveloperMetrics
-from ..analysis.nation_predictor import NationPredictor
-from ..analysis.domain_classifier import DomainClassifier
+from ..analysis.nation_predictor import nation_predictor
+from ..analysis.domain_classifier import domain_classifier
 
 @dataclass
 class DeveloperAnalysis:
@@ -23,33 +27,78 @@ class DeveloperAnalyzer:
     整合评分计算、国家推断和领域分类功能
     """
     
-    def __init__(self, github_token: str):
-        self.collector = GitHubDataCollector(github_token)
+    # 并发请求上限，避免触发 GitHub 的二级限流
+    MAX_CONCURRENT_REQUESTS = 10
+    
+    # 关系网络位置分批查询：前几批的用户数逐步增大，之后剩余用户一次并发查询
+    # 达到置信度阈值且样本足够时提前结束
+    NETWORK_TRANCHE_SIZES = (25, 100)
+    NETWORK_CONFIDENCE_THRESHOLD = 0.9
+    NETWORK_MIN_SAMPLES = 20
+    
+    # 活跃度衰减周期（天）：最近提交距今每多 180 天，仓库活跃度衰减为 1/e
+    ACTIVITY_DECAY_DAYS = 180
+    
+    def __init__(self, github_token: str, etag_store: Optional[ETagStore] = None,
+                 response_cache: Optional[ResponseCache] = None):
+        self.collector = GraphQLGitHubCollector(github_token, etag_store, response_cache)
+        self._semaphore = asyncio.Semaphore(self.MAX_CONCURRENT_REQUESTS)
+        # 进行中的分析任务：(用户名, 是否强制刷新) -> 任务
+        self._inflight: Dict[Tuple[str, bool], asyncio.Task] = {}
         self.rank_calculator = TalentRankCalculator()
-        self.nation_predictor = NationPredictor()
-        self.domain_classifier = DomainClassifier()
+        self.nation_predictor = nation_predictor
+        self.domain_classifier = domain_classifier
     
-    async def analyze_developer(self, username: str) -> DeveloperAnalysis:
+    async def close(self):
+        """
+        释放 GitHub 连接池
+        """
+        await self.collector.close()
+    
+    async def analyze_developer(self, username: str, force_refresh: bool = False) -> DeveloperAnalysis:
         """
         分析开发者并生成完整报告
+        force_refresh 为 True 时跳过采集器缓存
+        同一开发者、同一刷新方式的并发请求共享同一次分析
+        """
+        key = (username, force_refresh)
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._analyze_developer(username, force_refresh))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        
+        # shield 防止某个调用方被取消时连带取消共享的任务
+        return await asyncio.shield(task)
+    
+    async def _analyze_developer(self, username: str, force_refresh: bool) -> DeveloperAnalysis:
         """
-        # 获取开发者基础信息
-        profile = await self.collector.get_developer_profile(username)
+        执行一次完整的开发者分析
+        """
+        # 一次 GraphQL 查询获取开发者信息和仓库指标
+        snapshot = await self.collector.get_developer_snapshot(username, use_cache=not force_refresh)
+        profile = snapshot['profile']
+        
+        # 一次遍历收集每个仓库的（指标, 贡献）
+        repo_data = await self._collect_all_repo_data(username, snapshot['repositories'], not force_refresh)
         
         # 计算 TalentRank
-        talent_rank = await self._calculate_talent_rank(username, profile.repositories)
+        talent_rank = self._calculate_talent_rank(repo_data)
         
-        # 推断国家/地区
-        network_locations = await self._collect_network_locations(profile)
-        nation, confidence = self.nation_predictor.predict_nation(
-            profile.location,
-            network_locations
-        )
+        # 推断国家/地区，开发者自身位置可识别时无需查询关系网络
+        nation, confidence = self.nation_predictor.predict_nation(profile.location, [])
+        if confidence < 1.0:
+            network_locations = await self._collect_network_locations(profile, not force_refresh)
+            nation, confidence = self.nation_predictor.predict_nation(
+                profile.location,
+                network_locations
+            )
         
         # 分析技术领域
-        repositories = await self._collect_repository_details(profile.repositories)
-        contributions = await self._collect_contributions(username, profile.repositories)
-        domains = self.domain_classifier.classify_domains(repositories, contributions)
+        domains = self.domain_classifier.classify_domains(
+            [metrics for metrics, _ in repo_data],
+            [contributions for _, contributions in repo_data]
+        )
         
         return DeveloperAnalysis(
             username=username,
@@ -61,49 +110,52 @@ class DeveloperAnalyzer:
             last_updated=datetime.now()
         )
     
-    async def _calculate_talent_rank(self, username: str, repositories: List[str]) -> float:
+    async def _collect_all_repo_data(self, username: str, repository_metrics: Dict[str, Dict],
+                                     use_cache: bool = True) -> List[Tuple[Dict, Dict]]:
+        """
+        收集所有仓库的指标与贡献数据
+        仓库指标来自快照，贡献数据并发获取，每个仓库只请求一次
+        """
+        repo_contributions = await asyncio.gather(*(
+            self._limited(self.collector.get_developer_contributions(username, repo_name, use_cache))
+            for repo_name in repository_metrics
+        ))
+        return list(zip(repository_metrics.values(), repo_contributions))
+    
+    def _calculate_talent_rank(self, repo_data: List[Tuple[Dict, Dict]]) -> float:
         """
         计算开发者的 TalentRank 分数
         """
-        total_project_score = 0
-        total_contribution_score = 0
-        repo_count = 0
+        if not repo_data:
+            return 0
         
-        for repo_name in repositories:
-            # 获取仓库指标
-            metrics = await self.collector.get_repository_metrics(repo_name)
-            project_metrics = ProjectMetrics(
+        # 仓库指标与贡献指标
+        project_metrics = [
+            ProjectMetrics(
                 stars=metrics['stars'],
                 forks=metrics['forks'],
                 watchers=metrics['watchers']
             )
-            
-            # 获取贡献指标
-            contributions = await self.collector.get_developer_contributions(username, repo_name)
-            developer_metrics = DeveloperMetrics(
+            for metrics, _ in repo_data
+        ]
+        developer_metrics = [
+            DeveloperMetrics(
                 commits=contributions['commits_count'],
                 resolved_issues=contributions['resolved_issues'],
                 pull_requests=contributions['pull_requests'],
                 code_reviews=contributions['code_reviews']
             )
-            
-            # 计算得分
-            project_score = self.rank_calculator.calculate_project_importance(project_metrics)
-            contribution_score = self.rank_calculator.calculate_developer_contribution(developer_metrics)
-            
-            total_project_score += project_score
-            total_contribution_score += contribution_score
-            repo_count += 1
+            for _, contributions in repo_data
+        ]
         
-        if repo_count == 0:
-            return 0
-            
-        # 计算平均分
-        avg_project_score = total_project_score / repo_count
-        avg_contribution_score = total_contribution_score / repo_count
+        # 批量计算得分并取平均
+        project_scores = self.rank_calculator.calculate_project_importance_batch(project_metrics)
+        contribution_scores = self.rank_calculator.calculate_developer_contribution_batch(developer_metrics)
+        avg_project_score = float(project_scores.mean())
+        avg_contribution_score = float(contribution_scores.mean())
         
         # 计算活跃度系数
-        activity_factor = self._calculate_activity_factor(repositories)
+        activity_factor = self._calculate_activity_factor([metrics for metrics, _ in repo_data])
         
         return self.rank_calculator.calculate_final_score(
             avg_project_score,
@@ -111,50 +163,47 @@ class DeveloperAnalyzer:
             activity_factor
         )
     
-    async def _collect_network_locations(self, profile: DeveloperProfile) -> List[str]:
+    async def _collect_network_locations(self, profile: DeveloperProfile, use_cache: bool = True) -> List[str]:
         """
         收集开发者关系网络中的位置信息
+        关注者与正在关注的用户去重后分批查询，互相关注的用户只计一次
+        能映射到国家/地区的样本足够且推断结果足够确定时不再查询剩余用户
         """
-        locations = []
+        logins = list(dict.fromkeys(profile.followers + profile.following))
+        network_locations = []
         
-        # 收集关注者的位置信息
-        for follower in profile.followers:
-            follower_profile = await self.collector.get_developer_profile(follower)
-            if follower_profile.location:
-                locations.append(follower_profile.location)
+        start = 0
+        for size in (*self.NETWORK_TRANCHE_SIZES, len(logins)):
+            if start >= len(logins):
+                break
+            tranche = logins[start:start + size]
+            start += size
+            locations = await self.collector.get_locations_bulk(tranche, use_cache)
+            network_locations.extend(location for location in locations.values() if location)
+            
+            _, confidence, support = self.nation_predictor.network_consensus(network_locations)
+            if (confidence >= self.NETWORK_CONFIDENCE_THRESHOLD
+                    and support >= self.NETWORK_MIN_SAMPLES):
+                break
         
-        # 收集正在关注的用户的位置信息
-        for following in profile.following:
-            following_profile = await self.collector.get_developer_profile(following)
-            if following_profile.location:
-                locations.append(following_profile.location)
-                
-        return locations
+        return network_locations
     
-    async def _collect_repository_details(self, repositories: List[str]) -> List[Dict]:
+    async def _limited(self, coro: Awaitable):
         """
-        收集仓库详细信息
+        在并发上限内执行请求
         """
-        details = []
-        for repo_name in repositories:
-            metrics = await self.collector.get_repository_metrics(repo_name)
-            details.append(metrics)
-        return details
+        async with self._semaphore:
+            return await coro
     
-    async def _collect_contributions(self, username: str, repositories: List[str]) -> List[Dict]:
-        """
-        收集贡献信息
-        """
-        contributions = []
-        for repo_name in repositories:
-            contrib = await self.collector.get_developer_contributions(username, repo_name)
-            contributions.append(contrib)
-        return contributions
-    
-    def _calculate_activity_factor(self, repositories: List[str]) -> float:
+    def _calculate_activity_factor(self, repositories: List[Dict]) -> float:
         """
         计算活跃度系数
-        基于最近的活动频率计算
+        基于各仓库默认分支最近一次提交时间，按指数衰减后取平均
         """
-        # 简单实现，可以根据需求调整计算方法
-        return 1.0 
\ No newline at end of file
+        commit_dates = [repo['last_commit_at'] for repo in repositories if repo.get('last_commit_at')]
+        if not commit_dates:
+            return 1.0
+        
+        now = datetime.now(timezone.utc)
+        days = np.array([(now - date).total_seconds() for date in commit_dates]) / 86400
+        return float(np.exp(-np.maximum(days, 0) / self.ACTIVITY_DECAY_DAYS).mean()) 
\ No newline at end of file